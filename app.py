@@ -21,28 +21,40 @@ License:
 This code is distributed under the MIT License.
 """
 
-from dash import Dash, html, dcc, Output, Input
-import plotly.express as px
+from dash import Dash, html, dcc, Output, Input, State, Patch, ClientsideFunction, ctx, no_update
+from dash.exceptions import PreventUpdate
+from flask import request
 import pandas as pd
 import os
-import plotly.graph_objects as go
-import plotly
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import numpy as np
-from sklearn.cluster import DBSCAN
-from sklearn.preprocessing import StandardScaler
-from scipy.ndimage import label
+import pyarrow.parquet as pq
+import base64
+import diskcache
 import sys
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from rolling import SCORE_WINDOWS, SCORE_COLUMNS, rolling_sum_centered, rolling_mean_centered, rolling_median_binary_centered
 print(sys.version)
 
+# Serialize figures and callback responses with orjson instead of the stdlib
+# encoder; trace arrays are sent as base64 typed arrays (see typed_array)
+pio.json.config.default_engine = 'orjson'
+
 # Read the accession file
 accession_df = pd.read_csv('data/Accessions.csv', sep=',')
 accession_df = accession_df.drop_duplicates(subset=['Assembly_short']).sort_values('Organism Name')
 accession_df = accession_df.dropna(subset=['phylum'])
+# Organism name of each accession, used for the genome dropdown labels
+organism_labels = dict(zip(accession_df['Assembly_short'].to_numpy(),
+                           accession_df['Organism Name'].to_numpy()))
 # Prepare options for the dropdown
 dropdown_options = [
-    {'label': f"{row['Assembly_short']} - {row['Organism Name']}", 'value': row['Assembly_short']}
-    for index, row in accession_df.iterrows()
+    {'label': f"{accession} - {organism}", 'value': accession}
+    for accession, organism in organism_labels.items()
 ]
 
 dataset_filter_options = ['Casjens','Phoenix','DEPHT','Phaster']
@@ -51,6 +63,22 @@ taxonomic_levels = ['kingdom','phylum','class','order','family','genus','species
 initial_taxon = 'phylum'
 taxonomic_filter = accession_df[initial_taxon].unique()
 initial_taxon_filter = 'No Filter'
+
+# Precompute the genomes of every dataset, and of every taxon within each
+# taxonomic level, so the dropdowns can be filtered in the browser without a
+# server round trip. Only accessions are stored per group; their dropdown
+# labels are looked up in organism_labels, which holds each organism name once
+genome_index = {'genomes': {}, 'taxa': {}, 'labels': organism_labels}
+for dataset in dataset_filter_options:
+    filtered_df = accession_df[accession_df[dataset] == 1]
+    genome_index['genomes'][dataset] = filtered_df['Assembly_short'].tolist()
+    # groupby sorts the taxa and drops genomes with no value at that level
+    genome_index['taxa'][dataset] = {
+        level: {str(taxon): accessions.tolist()
+                for taxon, accessions in filtered_df.groupby(level)['Assembly_short']}
+        for level in taxonomic_levels
+    }
+
 #algorithm_options = [{'label': 'Moving Window Sum', 'value': 'mws'},
 #                    {'label': 'Moving Window Average', 'value': 'mwa'},
 #                    {'label': 'Median Filter', 'value': 'median'},
@@ -62,19 +90,33 @@ algorithm_options = [{'label': 'Moving Window Sum', 'value': 'mws'},
                     {'label': 'Moving Window Average', 'value': 'mwa'},
                     {'label': 'Median Filter', 'value': 'median'},
                     ]
-# Set the image path
-image_path = 'assets/phoenixlogo.jpg'
-
-# Initialize the app
-app = Dash(__name__)
+# Set the image path; like the CSS and JS Dash links from assets/, the logo
+# URL carries the file's modification time so browsers can cache it
+image_path = 'assets/phoenixlogo.webp'
+image_url = f"{image_path}?m={os.path.getmtime(image_path)}"
+
+# Initialize the app. Responses are compressed (zstd, brotli or gzip,
+# whichever the browser accepts): the genome index in the layout and the
+# figure JSON shrink to a fraction of their size
+app = Dash(__name__, compress=True)
 server = app.server  # Expose the Flask server instance
 
+# Flask sends files from assets/ with no-cache, so every page load
+# revalidates them. Requests with the modification time in the query string
+# name one version of the file and can be cached until it changes
+@server.after_request
+def cache_assets(response):
+    if request.path.startswith('/assets/') and 'm' in request.args and response.status_code == 200:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 # Define initial accession
 initial_accession = accession_df['Assembly_short'].iloc[0]
 initial_dataset = 'Phoenix'
 initial_algorithm = 'mws'
 
-colors = {
+# Trace colors; read-only since every figure shares the same strings
+colors = MappingProxyType({
     'yellow': 'rgba(249, 199, 13, 0.7)',
     'blue': 'rgba(78, 120, 166, 0.7)',
     'dk_blue': 'rgba(78, 120, 166, 1.0)',
@@ -88,7 +130,7 @@ colors = {
     'sage': 'rgba(144, 169, 85, 0.7)',
     'mauve': 'rgba(171, 142, 154, 0.7)',
     'black': 'rgba(0, 0, 0, 0.7)'
-}
+})
 
 threshold_defaults = {
     'mws': 0.4,
@@ -98,8 +140,72 @@ threshold_defaults = {
     'median': 0.5,
     'ccl': 0.4
 }
-# Load initial dataset
-csv_path = os.path.join('data/combined', f'processed_{initial_accession}_combined.csv')
+initial_threshold = threshold_defaults['mwa']
+# Map each accession to its processed dataset file once at startup so the
+# callbacks don't have to check the filesystem. Parquet files written by
+# scripts/csvs_to_parquet.py are preferred over the CSVs since they load
+# without parsing
+dataset_paths = {}
+for accession in accession_df['Assembly_short']:
+    for extension in ('parquet', 'csv'):
+        path = os.path.join('data/combined', f'processed_{accession}_combined.{extension}')
+        if os.path.exists(path):
+            dataset_paths[accession] = path
+            break
+
+# Parsed datasets are also persisted on disk so restarts skip the CSV parse.
+# Bump the version when load_dataset's processing changes so stale entries
+# are not reused
+dataset_cache = diskcache.Cache('.cache/phoenix')
+dataset_cache_version = 6
+
+# Columns of the processed files that the app plots; the per-class model
+# probabilities make up most of each file but are never used, so they are not
+# loaded and the cached frames stay small
+dataset_columns = ['gc', 'caduceus_pred', 'dnabert2_pred', 'grover_pred', 'reference_label']
+
+# The gLM prediction and reference tracks only hold 0/1 calls
+binary_columns = ['Predictions', 'DNABERT2', 'Grover', 'Reference']
+
+# Parse a processed dataset once per accession; later selections of the same
+# genome are served from memory instead of re-reading the CSV
+@lru_cache(maxsize=None)
+def load_dataset(accession):
+    path = dataset_paths[accession]
+    # Keyed on the file and its mtime so a regenerated dataset is loaded again
+    cache_key = (path, os.path.getmtime(path), dataset_cache_version)
+    df = dataset_cache.get(cache_key)
+    if df is not None:
+        return df
+    if path.endswith('.parquet'):
+        schema_names = pq.read_schema(path).names
+        # Scores precomputed by scripts/csvs_to_parquet.py let score_genome skip the
+        # moving-window kernels; files scored with other windows lack these
+        # columns and are rescored
+        columns = dataset_columns + [column for column in SCORE_COLUMNS.values() if column in schema_names]
+        df = pd.read_parquet(path, columns=columns, memory_map=True)
+    else:
+        # pyarrow's multi-threaded parser is about twice as fast as the C engine here
+        df = pd.read_csv(path, engine='pyarrow', usecols=dataset_columns)
+    df.rename(columns={
+        'caduceus_pred': 'Predictions',
+        'dnabert2_pred': 'DNABERT2',
+        'grover_pred': 'Grover',
+        'reference_label': 'Reference',
+        'median': 'Median',
+        'mwa': 'Moving Weight Average',
+        'rle': 'Run Length Encoding',
+        'dbscan': 'DBScan',
+        'ccl': 'Connected Component Labeling',
+        'window_sum': 'Window Summation'
+    }, inplace=True)
+    # Store the 0/1 tracks as uint8 instead of int64, an eighth of the memory
+    df[binary_columns] = df[binary_columns].astype(np.uint8)
+    # GC content is stored with two decimals, which float32 holds exactly
+    # enough for plotting at half the memory and a shorter JSON encoding
+    df['gc'] = df['gc'].astype(np.float32)
+    dataset_cache.set(cache_key, df)
+    return df
 
 app.layout = html.Div([
     # Main container with flex display
@@ -108,7 +214,7 @@ app.layout = html.Div([
         html.Div([
             # Logo
             html.Img(
-                src=image_path,
+                src=image_url,
                 style={
                     'width': '100%',
                     'max-width': '300px',
@@ -178,7 +284,7 @@ app.layout = html.Div([
                     dcc.Input(
                         id='threshold-input',
                         type='number',
-                        value=threshold_defaults['mwa'],
+                        value=initial_threshold,
                         min=0,
                         step=0.01,
                         style={'width': '100%', 'padding': '5px'}
@@ -221,14 +327,28 @@ app.layout = html.Div([
         }),
         # Main Content Area (Graph)
         html.Div([
-            dcc.Graph(
-                id='graph-content',
-                config={'displayModeBar': True},
-                style={
-                    'height': 'calc(100vh - 40px)',  # Full height minus padding
-                    'width': '100%'
-                }
-            )
+            # Show a spinner over the current figure while a genome that is not
+            # cached yet loads; quick updates like zooming finish before the
+            # delay and don't flash it
+            dcc.Loading(
+                dcc.Graph(
+                    id='graph-content',
+                    config={'displayModeBar': True},
+                    style={
+                        'height': 'calc(100vh - 40px)',  # Full height minus padding
+                        'width': '100%'
+                    }
+                ),
+                target_components={'graph-content': 'figure'},
+                delay_show=300,
+                overlay_style={'visibility': 'visible', 'opacity': 0.5}
+            ),
+            # Genome and x range currently drawn in the graph, used to patch
+            # zoom and threshold changes into the existing figure
+            dcc.Store(id='graph-view'),
+            # Genomes by dataset, taxonomic level and taxon, read by
+            # the clientside dropdown callback in assets/callbacks.js
+            dcc.Store(id='genome-index', data=genome_index)
         ], style={
             'flex': '1',  # Takes up remaining space
             'padding': '20px',
@@ -245,274 +365,341 @@ app.layout = html.Div([
     'height': '100vh'
 })
 
-# Function to create the plot based on selected data
-def create_heatmap_figure(dataset_filter, taxon_filter, taxon_list, accession, threshold_value=25, algorithm='mws'):
-    try:
-        # Construct the path to the dataset CSV file
-        csv_path = os.path.join('data/combined', f'processed_{accession}_combined.csv')
-
-        # Check if the file exists
-        if not os.path.exists(csv_path):
-            # Handle the case where the file does not exist
-            # Create a figure with an error message
-            fig = px.imshow([[0]], text_auto=True)
-            fig.update_layout(
-                title="Error loading data",
-                xaxis_visible=False,
-                yaxis_visible=False,
-                annotations=[dict(text=f"Dataset file {csv_path} not found.", showarrow=False,
-                                  xref="paper", yref="paper", x=0.5, y=0.5, font=dict(size=16))]
-            )
-            return fig
-
-        # Load the dataset
-        df = pd.read_csv(csv_path)
-        
-        df.rename(columns={
-            'caduceus_pred': 'Predictions',
-            'dnabert2_pred': 'DNABERT2',
-            'grover_pred': 'Grover',
-            'reference_label': 'Reference',
-            'median': 'Median',
-            'mwa': 'Moving Weight Average',
-            'rle': 'Run Length Encoding',
-            'dbscan': 'DBScan',
-            'ccl': 'Connected Component Labeling',
-            'window_sum': 'Window Summation'
-        }, inplace=True)
-        
-        colors = {
-            'yellow': 'rgba(249, 199, 13, 0.7)',
-            'blue': 'rgba(78, 120, 166, 0.7)',
-            'dk_blue': 'rgba(78, 120, 166, 1.0)',
-            'white': 'rgba(255, 255, 255, 0.7)',
-            'green': 'rgba(18, 168, 138, 0.7)',
-            'rose': 'rgba(203, 71, 121, 0.7)',
-            'terracotta': 'rgba(219, 112, 87, 0.7)',
-            'purple': 'rgba(123, 97, 166, 0.7)',
-            'teal': 'rgba(56, 163, 165, 0.7)',
-            'gold': 'rgba(212, 175, 55, 0.7)',
-            'sage': 'rgba(144, 169, 85, 0.7)',
-            'mauve': 'rgba(171, 142, 154, 0.7)',
-            'black': 'rgba(0, 0, 0, 0.7)'
-        }
-
-        # add Scoring Algorithm
-        if algorithm == 'mws':
-            df['algo'] = df['Predictions'].rolling(window=85,center=True, min_periods=1).sum()/85
-            df['algo'] = df['algo'].fillna(0)
-            df['predicted_interval'] = [1 if x > threshold_value else 0 for x in df['algo']]
-
-        elif algorithm == 'mwa':   # Moving Window Average
-            # Calculate moving window average
-            df['algo'] = df['Predictions'].rolling(window=70,center=True, min_periods=1).mean()
-            df['algo'] = df['algo'].fillna(0)
-            df['predicted_interval'] = [1 if x > threshold_value else 0 for x in df['algo']]
-            
-        elif algorithm == 'rle':  # Run Length Encoding
-           df['algo'] = df['Run Length Encoding']
-           df['predicted_interval'] = df['algo']
-
-
-        elif algorithm == 'dbscan':  # DBScan
-           df['algo'] = df['DBScan']
-           df['predicted_interval'] = df['algo']
-
-
-        elif algorithm == 'median':  # Median Filter
-           # Apply median filtering
-           df['algo'] = df['Predictions'].rolling(window=60,center=True, min_periods=1).median()
-           df['algo'] = df['algo'].fillna(0)
-           df['predicted_interval'] = [1 if x > threshold_value else 0 for x in df['algo']]
-
-
-        elif algorithm == 'ccl':  # Connected Component Labeling
-            df['algo'] = df['Connected Component Labeling']
-            df['predicted_interval'] = df['algo']
-
-        fig = plotly.subplots.make_subplots(rows=7, cols=1, shared_xaxes=True, vertical_spacing=0.01, row_heights=[0.2,0.2,0.05,0.5,0.15,0.15,0.15])
-
-        # Plot score data on the 1st subplot
-        fig.add_trace(go.Scatter(x=df.index, y=df["Reference"],
-                          fill='tonexty',
-                          name='Reference Locations',
-                          line_color=colors['yellow'],
-                          fillcolor=colors['yellow'],
-                          legendrank=5
-                          ))
-
-        # Plot predicted phage signal on 2nd row
-        fig.add_trace(go.Scatter(x=df.index, y=df["predicted_interval"],
-                 fill='tonexty',
-                 name='gLM Predicted Locations',
-                 line_color=colors['rose'],
-                 fillcolor=colors['rose'],
-                 legendrank=4
-              ), row=2, col=1)
-        
-
-        # Plot GC on 3th row
-        fig.add_trace(go.Scatter(x=df.index, y=df["gc"],
-                 fill='tonexty',
-                 name='Moving Window Sum',
-                 line_color=colors['yellow'],
-                 fillcolor=colors['yellow'],
-                 legendrank=3
-              ), row=3, col=1)
-
-        # Plot Moving Window Sum on 4nd row
-        fig.add_trace(go.Scatter(x=df.index, y=df["algo"],
-                 fill='tonexty',
-                 name='Moving Window Sum',
-                 line_color=colors['dk_blue'],
-                 fillcolor=colors['dk_blue'],
-                 legendrank=2
-              ), row=4, col=1)
-        fig.add_hline(y=threshold_value, line_dash="dash", line_color="black", row=4, col=1,
-              annotation_text="Threshold", 
-              annotation_position="right")
-        
-
-        # Plot raw gLM signal on 5th row
-        fig.add_trace(go.Scatter(x=df.index,
-                 y=df['Predictions'], 
-                 fill='tozeroy',
-                 name='Caduceus signal',
-                 line_color=colors['dk_blue'],
-                 fillcolor=colors['dk_blue'],
-                 legendrank=1
-                 ), row=5, col=1)
-
-        # Plot DNABERT2 signal on 6th row
-        fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['DNABERT2'],
-                fill='tozeroy',
-                name='DNABERT2 signal',
-                line_color=colors['terracotta'], 
-                fillcolor=colors['terracotta'],
-                legendrank=0
-        ), row=6, col=1)
-
-        # Plot Grover signal on 7th row
-        fig.add_trace(go.Scatter(
-                x=df.index,
-                y=df['Grover'],
-                fill='tozeroy',
-                name='Grover signal',
-                line_color=colors['teal'],  
-                fillcolor=colors['teal'],
-                legendrank=-1
-        ), row=7, col=1)
-
-        fig.update_yaxes(title_text="Reference",title_standoff=0,showticklabels=False, row=1, col=1)
-        fig.update_yaxes(title_text="Predicted",title_standoff=0,showticklabels=False, row=2, col=1)
-        fig.update_yaxes(title_text="GC",title_standoff=0,showticklabels=False, range=[df["gc"].min(), df["gc"].max()], row=3, col=1)
-        fig.update_yaxes(title_text="Score",title_standoff=0,showticklabels=False, row=4, col=1)
-        fig.update_yaxes(title_text="Caduceus",title_standoff=0,showticklabels=False, row=5, col=1)
-        fig.update_yaxes(title_text="DNABERT2", title_standoff=0, showticklabels=False, row=6, col=1)  
-        fig.update_yaxes(title_text="Grover", title_standoff=0, showticklabels=False, row=7, col=1)  
-        fig.update_yaxes(dtick=10)  
-        fig.update_xaxes(dtick=100000)  
-
-        fig.update_layout(
-            height=1000,  # Fixed height in pixels
-            autosize=True,  # Allow the figure to resize horizontally
-            showlegend=True,
-            xaxis_rangeslider_visible=False,
-            xaxis7_rangeslider_visible=True,
-            xaxis7=dict(
-                rangeslider=dict(
-                    thickness=0.05,
-                )
-            ),
-            margin=dict(l=50, r=50, t=30, b=30)  # Fixed margins in pixels
+# Apply the selected scoring algorithm to a genome's gLM predictions. The
+# score does not depend on the threshold, so it is cached on its own and a
+# threshold change only repeats the comparison in score_dataset
+@lru_cache(maxsize=32)
+def score_genome(accession, algorithm):
+    df = load_dataset(accession)
+
+    # Use the score precomputed in the Parquet file when there is one
+    if SCORE_COLUMNS.get(algorithm) in df:
+        return df[SCORE_COLUMNS[algorithm]].to_numpy()
+
+    # add Scoring Algorithm
+    if algorithm == 'mws':
+        return rolling_sum_centered(df['Predictions'].to_numpy(), SCORE_WINDOWS['mws'])/SCORE_WINDOWS['mws']
+
+    elif algorithm == 'mwa':   # Moving Window Average
+        # Calculate moving window average
+        return rolling_mean_centered(df['Predictions'].to_numpy(), SCORE_WINDOWS['mwa'])
+
+    elif algorithm == 'rle':  # Run Length Encoding
+       return df['Run Length Encoding'].to_numpy()
+
+    elif algorithm == 'dbscan':  # DBScan
+       return df['DBScan'].to_numpy()
+
+    elif algorithm == 'median':  # Median Filter
+       # Apply median filtering; Predictions only holds 0/1 calls, so the
+       # median follows from the count of ones in each window
+       return rolling_median_binary_centered(df['Predictions'].to_numpy(), SCORE_WINDOWS['median'])
+
+    elif algorithm == 'ccl':  # Connected Component Labeling
+        return df['Connected Component Labeling'].to_numpy()
+
+    raise ValueError(f"Unknown algorithm {algorithm}")
+
+# Add the score and the intervals it predicts at the threshold to a genome's
+# dataset. Cached so zooming only slices the visible window out of an already
+# scored genome
+@lru_cache(maxsize=32)
+def score_dataset(accession, threshold_value, algorithm):
+    # Load the dataset (cached); shallow copy so the algorithm columns
+    # added below do not leak into the cached frame
+    df = load_dataset(accession).copy(deep=False)
+    algo = score_genome(accession, algorithm)
+
+    # The clustering algorithms already output the called intervals
+    if algorithm in ('rle', 'dbscan', 'ccl'):
+        df['predicted_interval'] = algo
+    else:
+        df['predicted_interval'] = (algo > threshold_value).astype(np.int8)
+
+    # The score is thresholded above at full precision; the plotted copy only
+    # needs float32, which halves its memory and its size in the figure JSON
+    df['algo'] = algo.astype(np.float32)
+
+    return df
+
+# Upper bound on the points sent per track; the view is re-sampled at higher
+# resolution when the user zooms in
+max_shown_points = 2000
+
+# Track drawn on each subplot row, top to bottom: the signal column, legend
+# name, color, fill mode and legend rank of its trace
+trace_config = [
+    ('Reference', 'Reference Locations', 'yellow', 'tonexty', 5),
+    ('predicted_interval', 'gLM Predicted Locations', 'rose', 'tonexty', 4),
+    ('gc', 'Moving Window Sum', 'yellow', 'tonexty', 3),
+    ('algo', 'Moving Window Sum', 'dk_blue', 'tonexty', 2),
+    ('Predictions', 'Caduceus signal', 'dk_blue', 'tozeroy', 1),
+    ('DNABERT2', 'DNABERT2 signal', 'terracotta', 'tozeroy', 0),
+    ('Grover', 'Grover signal', 'teal', 'tozeroy', -1),
+]
+
+# Order of the signal columns matching the traces in create_heatmap_figure
+trace_columns = [column for column, *_ in trace_config]
+
+# Reduce a track to at most n_out points for the given x range using min/max
+# decimation, which keeps the extremes of every bin so narrow peaks survive
+def downsample(values, x_range=None, n_out=max_shown_points):
+    values = np.asarray(values)
+    lo, hi = 0, len(values)
+    if x_range is not None:
+        lo = min(max(int(np.floor(x_range[0])) - 1, 0), len(values))
+        hi = max(min(int(np.ceil(x_range[1])) + 2, len(values)), lo)
+    # Narrowest unsigned type for the window indices, usually uint16, since
+    # they are sent as typed arrays
+    x = np.arange(lo, hi, dtype=np.min_scalar_type(len(values)))
+    y = values[lo:hi]
+    if len(y) <= n_out:
+        return x, y
+
+    n_bins = n_out // 2
+    bin_size = -(-len(y) // n_bins)
+    bins = np.pad(y, (0, n_bins * bin_size - len(y)), mode='edge').reshape(n_bins, bin_size)
+    offsets = np.arange(n_bins) * bin_size
+    idx = np.concatenate([offsets + bins.argmin(axis=1), offsets + bins.argmax(axis=1)])
+    idx = np.unique(np.minimum(idx, len(y) - 1))
+    return x[idx], y[idx]
+
+# Typed array element types plotly.js can decode
+typed_array_dtypes = {'i1', 'u1', 'i2', 'u2', 'i4', 'u4', 'f4', 'f8'}
+
+# Encode a trace array as a plotly.js typed array spec. Base64 of the raw
+# values is a fraction of the size of the decimal JSON list plotly.py would
+# otherwise write, and the browser doesn't have to parse every number
+def typed_array(values):
+    values = np.ascontiguousarray(values)
+    if values.dtype.str[1:] not in typed_array_dtypes:
+        values = values.astype(np.float64)
+    return {'dtype': values.dtype.str[1:], 'bdata': base64.b64encode(values).decode('ascii')}
+
+# Subplot grid and static layout shared by every genome figure. make_subplots
+# and the update_* calls validate the whole figure, so they run once here and
+# create_heatmap_figure only supplies the traces, GC range and threshold line
+layout_figure = make_subplots(rows=7, cols=1, shared_xaxes=True, vertical_spacing=0.01, row_heights=[0.2,0.2,0.05,0.5,0.15,0.15,0.15])
+layout_figure.update_yaxes(title_text="Reference",title_standoff=0,showticklabels=False, row=1, col=1)
+layout_figure.update_yaxes(title_text="Predicted",title_standoff=0,showticklabels=False, row=2, col=1)
+layout_figure.update_yaxes(title_text="GC",title_standoff=0,showticklabels=False, row=3, col=1)
+layout_figure.update_yaxes(title_text="Score",title_standoff=0,showticklabels=False, row=4, col=1)
+layout_figure.update_yaxes(title_text="Caduceus",title_standoff=0,showticklabels=False, row=5, col=1)
+layout_figure.update_yaxes(title_text="DNABERT2", title_standoff=0, showticklabels=False, row=6, col=1)
+layout_figure.update_yaxes(title_text="Grover", title_standoff=0, showticklabels=False, row=7, col=1)
+layout_figure.update_yaxes(dtick=10)
+layout_figure.update_xaxes(dtick=100000)
+
+layout_figure.update_layout(
+    height=1000,  # Fixed height in pixels
+    autosize=True,  # Allow the figure to resize horizontally
+    showlegend=True,
+    xaxis_rangeslider_visible=False,
+    xaxis7_rangeslider_visible=True,
+    xaxis7=dict(
+        rangeslider=dict(
+            thickness=0.05,
         )
+    ),
+    margin=dict(l=50, r=50, t=30, b=30)  # Fixed margins in pixels
+)
 
+layout_figure.update_layout(
+    legend=dict(
+        x=1,  # x-coordinate of the legend (0 is left, 1 is right)
+        y=1,  # y-coordinate of the legend (0 is bottom, 1 is top)
+        xanchor="right",  # anchor point of the legend on the x-axis
+        yanchor="top",  # anchor point of the legend on the y-axis
+    )
+)
+figure_layout = layout_figure.to_dict()['layout']
+
+# Empty figure with a centred message, shown in place of the plot on errors
+error_figure_template = {
+    'data': [],
+    'layout': {
+        'title': {'text': ''},
+        'xaxis': {'visible': False},
+        'yaxis': {'visible': False},
+        'annotations': [{'text': '', 'showarrow': False, 'xref': 'paper', 'yref': 'paper',
+                         'x': 0.5, 'y': 0.5, 'font': {'size': 16}}]
+    }
+}
 
-        fig.update_layout(
-            legend=dict(
-                x=1,  # x-coordinate of the legend (0 is left, 1 is right)
-                y=1,  # y-coordinate of the legend (0 is bottom, 1 is top)
-                xanchor="right",  # anchor point of the legend on the x-axis
-                yanchor="top",  # anchor point of the legend on the y-axis
-            )       
-        )
-        return fig
+def error_figure(title, message):
+    fig = copy.deepcopy(error_figure_template)
+    fig['layout']['title']['text'] = title
+    fig['layout']['annotations'][0]['text'] = message
+    return fig
+
+# Build the figure for a genome. The figure only depends on the genome,
+# threshold and algorithm, so it is memoized on those and returned as a plain
+# dict that Dash serializes directly. Errors are raised rather than turned
+# into an error figure, so a failed load is not cached and is retried
+@lru_cache(maxsize=64)
+def build_heatmap_figure(accession, threshold_value, algorithm):
+    df = score_dataset(accession, threshold_value, algorithm)
+
+    # One trace per subplot row, downsampled for the full genome
+    data = []
+    for row, (column, name, color, fill, legendrank) in enumerate(trace_config, start=1):
+        # Plotly names the first subplot's axes x and y, then x2, y2, ...
+        axis = row if row > 1 else ''
+        x, y = downsample(df[column])
+        data.append(dict(type='scattergl', x=typed_array(x), y=typed_array(y), xaxis=f'x{axis}', yaxis=f'y{axis}',
+                         fill=fill,
+                         name=name,
+                         line=dict(color=colors[color]),
+                         fillcolor=colors[color],
+                         legendrank=legendrank
+                         ))
+
+    # Fill in the per-genome GC range and the threshold line on the score row
+    layout = dict(
+        figure_layout,
+        yaxis3=dict(figure_layout['yaxis3'], range=[df["gc"].min(), df["gc"].max()]),
+        shapes=[dict(type='line', xref='x4 domain', yref='y4', x0=0, x1=1,
+                     y0=threshold_value, y1=threshold_value,
+                     line=dict(color='black', dash='dash'))],
+        annotations=[dict(text='Threshold', showarrow=False, xref='x4 domain', yref='y4',
+                          x=1, y=threshold_value, xanchor='left', yanchor='middle')]
+    )
+    return {'data': data, 'layout': layout}
 
+# Function to create the plot based on selected data, showing a message in
+# place of the plot when the genome can't be loaded
+def create_heatmap_figure(accession, threshold_value=25, algorithm='mws'):
+    # Check that a dataset file exists for this accession
+    if accession not in dataset_paths:
+        # Handle the case where the file does not exist
+        return error_figure("Error loading data", f"Dataset file for {accession} not found.")
+
+    try:
+        return build_heatmap_figure(accession, threshold_value, algorithm)
     except Exception as e:
         # If there is an error, return an empty figure or display an error message
         print(f"Error loading data for {accession}: {e}")
-        # Create a figure with an error message
-        fig = px.imshow([[0]], text_auto=True)
-        fig.update_layout(
-            title="Error Loading Data",
-            xaxis_visible=False,
-            yaxis_visible=False,
-            annotations=[dict(text="Error loading data. Please check the data file.", showarrow=False,
-                              xref="paper", yref="paper", x=0.5, y=0.5, font=dict(size=16))]
-        )
-        return fig
-
-# Callback to update the heatmap when the dataset or selected rows change
-# Callback to update all components
-@app.callback(
+        return error_figure("Error Loading Data", "Error loading data. Please check the data file.")
+
+# Warm the caches in the background so the server starts right away: first
+# the figure the page opens with, so the first visit after a restart is served
+# from the figure cache, then the other datasets so most genomes are loaded
+# before they are first selected. A selection that races the warm-up just
+# loads directly
+prefetch_executor = ThreadPoolExecutor(max_workers=4)
+prefetch_executor.submit(create_heatmap_figure, initial_accession, initial_threshold, initial_algorithm)
+for accession in dataset_paths:
+    if accession != initial_accession:
+        prefetch_executor.submit(load_dataset, accession)
+
+# Filter the taxon and genome dropdowns in the browser from the precomputed
+# genome index; see assets/callbacks.js
+app.clientside_callback(
+    ClientsideFunction(namespace='phoenix', function_name='update_dropdowns'),
     [Output('taxonomic_filter', 'options'),
      Output('taxonomic_filter', 'value'),
      Output('dataset-dropdown', 'options'),
-     Output('dataset-dropdown', 'value'),
-     Output('graph-content', 'figure')],
+     Output('dataset-dropdown', 'value')],
     [Input('dataset-filter-dropdown', 'value'),
      Input('taxonomic_levels', 'value'),
-     Input('taxonomic_filter', 'value'),
-     Input('dataset-dropdown', 'value'),
+     Input('taxonomic_filter', 'value')],
+    [State('dataset-dropdown', 'value'),
+     State('genome-index', 'data')]
+)
+
+# Callback to update the heatmap when the genome, threshold or algorithm change
+@app.callback(
+    [Output('graph-content', 'figure'),
+     Output('graph-view', 'data')],
+    [Input('dataset-dropdown', 'value'),
      Input('threshold-input', 'value'),
-     Input('algorithm', 'value')]
+     Input('algorithm', 'value')],
+    State('graph-view', 'data')
 )
-def update_dashboard(dataset_filter, taxon_level, taxon_filter, selected_accession, threshold_value, algorithm):
-    # First filter by dataset
-    filtered_df = accession_df[accession_df[dataset_filter] == 1]
-    
-    # Get unique values for the selected taxonomic level
-    taxon_options = sorted(filtered_df[taxon_level].unique())
-    
-    # Create taxonomic filter options with "No Filter" as the first option
-    taxon_dropdown_options = [{'label': 'No Filter', 'value': 'no_filter'}] + [
-        {'label': str(taxon), 'value': str(taxon)} for taxon in taxon_options
-    ]
-    
-    # Set default to "No Filter" if no filter is selected or if current filter is invalid
-    if not taxon_filter or str(taxon_filter) not in [opt['value'] for opt in taxon_dropdown_options]:
-        taxon_filter = 'no_filter'
-    
-    # Apply taxonomic filter only if a specific taxon is selected
-    df_for_genome_list = filtered_df
-    if taxon_filter != 'no_filter' and taxon_level and taxon_filter:
-        df_for_genome_list = filtered_df[filtered_df[taxon_level].astype(str) == str(taxon_filter)]
-    
-    # Create genome dropdown options from filtered dataframe
-    genome_options = [
-        {'label': f"{row['Assembly_short']} - {row['Organism Name']}", 'value': row['Assembly_short']}
-        for index, row in df_for_genome_list.iterrows()
-    ]
-    
-    # If current genome selection is not in new options, select the first available option
-    if not genome_options or selected_accession not in [opt['value'] for opt in genome_options]:
-        selected_accession = df_for_genome_list['Assembly_short'].iloc[0] if not df_for_genome_list.empty else None
-    
-    # Get the list of all taxa for the selected level
-    taxon_list = df_for_genome_list[taxon_level].unique() if not df_for_genome_list.empty else []
-    
+def update_dashboard(selected_accession, threshold_value, algorithm, view):
+    # The threshold and algorithm only change the predicted and score tracks,
+    # so patch those into the figure already shown for this genome instead of
+    # resending the whole figure
+    triggered = set(ctx.triggered_prop_ids.values())
+
+    # The genome is already shown; rebuilding it would only reset the zoom
+    if triggered == {'dataset-dropdown'} and view and view['accession'] == selected_accession:
+        raise PreventUpdate
+
+    if (triggered and triggered <= {'threshold-input', 'algorithm'}
+            and view and view['accession'] == selected_accession):
+        try:
+            df = score_dataset(selected_accession, threshold_value, algorithm)
+        except Exception as e:
+            print(f"Error loading data for {selected_accession}: {e}")
+        else:
+            # The score track only changes with the algorithm
+            columns = ['predicted_interval']
+            if 'algorithm' in triggered:
+                columns.append('algo')
+            fig = Patch()
+            for column in columns:
+                i = trace_columns.index(column)
+                x, y = downsample(df[column], view['x_range'])
+                fig['data'][i]['x'] = typed_array(x)
+                fig['data'][i]['y'] = typed_array(y)
+            fig['layout']['shapes'][0]['y0'] = threshold_value
+            fig['layout']['shapes'][0]['y1'] = threshold_value
+            fig['layout']['annotations'][0]['y'] = threshold_value
+            return fig, no_update
+
     # Create the figure
-    fig = create_heatmap_figure(dataset_filter, taxon_filter, taxon_list, selected_accession, threshold_value, algorithm)
-    
-    return (
-        taxon_dropdown_options,
-        taxon_filter,
-        genome_options,
-        selected_accession,
-        fig
-    )
+    fig = create_heatmap_figure(selected_accession, threshold_value, algorithm)
+
+    # A new figure starts fully zoomed out; error figures can't be patched
+    view = None
+    if len(fig['data']) == len(trace_columns):
+        view = {'accession': selected_accession, 'x_range': None}
+
+    return fig, view
+
+# Re-sample the tracks for the visible x range when the user zooms or pans, so
+# zoomed-in regions are shown at full resolution without rebuilding the figure
+@app.callback(
+    [Output('graph-content', 'figure', allow_duplicate=True),
+     Output('graph-view', 'data', allow_duplicate=True)],
+    Input('graph-content', 'relayoutData'),
+    [State('graph-view', 'data'),
+     State('threshold-input', 'value'),
+     State('algorithm', 'value')],
+    prevent_initial_call=True
+)
+def update_view(relayout_data, view, threshold_value, algorithm):
+    # Find the new x range; rangeslider drags report it as a list, box zooms
+    # as separate range[0]/range[1] keys, and resets as autorange
+    x_range = False
+    for key, value in (relayout_data or {}).items():
+        axis, _, prop = key.partition('.')
+        if not axis.startswith('xaxis'):
+            continue
+        if prop == 'range':
+            x_range = value
+        elif prop == 'range[0]':
+            x_range = [value, relayout_data[f'{axis}.range[1]']]
+        elif prop == 'autorange':
+            x_range = None
+    if x_range is False or not view:
+        raise PreventUpdate
+
+    accession = view['accession']
+    try:
+        df = score_dataset(accession, threshold_value, algorithm)
+    except Exception as e:
+        print(f"Error updating view for {accession}: {e}")
+        raise PreventUpdate
+
+    patched = Patch()
+    for i, column in enumerate(trace_columns):
+        x, y = downsample(df[column], x_range)
+        patched['data'][i]['x'] = typed_array(x)
+        patched['data'][i]['y'] = typed_array(y)
+    return patched, {'accession': accession, 'x_range': x_range}
+
 if __name__ == '__main__':
     app.run_server(debug=True)
 
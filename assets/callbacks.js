@@ -0,0 +1,48 @@
+/* assets/callbacks.js */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    phoenix: {
+        // Cascade the dataset and taxonomic level choices into the taxon and
+        // genome dropdowns using the genome index built by app.py
+        update_dropdowns: function(datasetFilter, taxonLevel, taxonFilter, selectedAccession, genomeIndex) {
+            const taxa = genomeIndex.taxa[datasetFilter][taxonLevel];
+
+            // Create taxonomic filter options with "No Filter" as the first option
+            const taxonOptions = [{label: 'No Filter', value: 'no_filter'}];
+            for (const taxon of Object.keys(taxa)) {
+                taxonOptions.push({label: taxon, value: taxon});
+            }
+
+            // Set default to "No Filter" if no filter is selected or if current filter is invalid
+            let taxonValue = taxonFilter;
+            if (!taxonValue || !Object.prototype.hasOwnProperty.call(taxa, String(taxonValue))) {
+                taxonValue = 'no_filter';
+            }
+            const accessions = taxonValue === 'no_filter'
+                ? genomeIndex.genomes[datasetFilter]
+                : taxa[String(taxonValue)];
+
+            // Create genome dropdown options from the filtered accessions
+            const genomeOptions = accessions.map(accession => ({
+                label: accession + ' - ' + genomeIndex.labels[accession],
+                value: accession
+            }));
+
+            // If current genome selection is not in new options, select the first available option
+            let genomeValue = selectedAccession;
+            if (!accessions.includes(genomeValue)) {
+                genomeValue = accessions.length ? accessions[0] : null;
+            }
+
+            // Only return values that changed; Dash re-runs every callback that
+            // listens to a returned value, so resending the same genome would
+            // rebuild the figure and reset the zoom
+            const noUpdate = window.dash_clientside.no_update;
+            return [
+                taxonOptions,
+                taxonValue === taxonFilter ? noUpdate : taxonValue,
+                genomeOptions,
+                genomeValue === selectedAccession ? noUpdate : genomeValue
+            ];
+        }
+    }
+});
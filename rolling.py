@@ -0,0 +1,48 @@
+"""
+rolling.py
+
+Centred moving-window kernels used by the Phoenix app to score gLM prediction
+tracks. They match pandas' rolling(window, center=True, min_periods=1) but run
+in a single vectorized pass over a prefix sum instead of pandas' per-window
+machinery.
+"""
+
+import numpy as np
+
+# Window lengths of the moving-window scoring algorithms, shared by app.py and
+# scripts/csvs_to_parquet.py
+SCORE_WINDOWS = {'mws': 85, 'mwa': 70, 'median': 60}
+
+# Names of the precomputed score columns; the window is part of the name so a
+# file scored with other windows is not mistaken for a current one
+SCORE_COLUMNS = {algorithm: f'algo_{algorithm}_{window}' for algorithm, window in SCORE_WINDOWS.items()}
+
+
+def window_bounds(n, window):
+    # pandas centres a window of length w on label i as [i - w//2, i - w//2 + w),
+    # clipped to the array for min_periods=1
+    start = np.arange(n) - window // 2
+    end = start + window
+    return np.clip(start, 0, n), np.clip(end, 0, n)
+
+
+def rolling_sum_centered(values, window):
+    values = np.asarray(values, dtype=np.float64)
+    start, end = window_bounds(len(values), window)
+    cumsum = np.concatenate(([0.0], np.cumsum(values)))
+    return cumsum[end] - cumsum[start]
+
+
+def rolling_mean_centered(values, window):
+    start, end = window_bounds(len(values), window)
+    return rolling_sum_centered(values, window) / (end - start)
+
+
+def rolling_median_binary_centered(values, window):
+    # For a 0/1 track the median of a window only depends on how many ones it
+    # holds: 1 with more ones than zeros, 0 with fewer, and 0.5 (the mean of
+    # the two middle values) on a tie in an even-sized window
+    start, end = window_bounds(len(values), window)
+    ones = 2 * rolling_sum_centered(values, window)
+    counts = end - start
+    return 0.5 * (ones > counts) + 0.5 * (ones >= counts)
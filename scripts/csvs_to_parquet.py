@@ -0,0 +1,57 @@
+"""
+csvs_to_parquet.py
+
+Converts the processed per-genome CSV files in data/combined to Parquet.
+app.py loads the Parquet file for an accession when one exists, which skips
+CSV parsing and type inference on startup. The moving-window scores of the
+Caduceus predictions are precomputed and stored alongside, so the app only
+has to apply the threshold.
+
+Usage:
+    python scripts/csvs_to_parquet.py
+"""
+
+import glob
+import os
+import sys
+
+import pandas as pd
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_DIR = os.path.join(REPO_DIR, 'data', 'combined')
+
+sys.path.insert(0, REPO_DIR)
+from rolling import (SCORE_WINDOWS, SCORE_COLUMNS, rolling_sum_centered, rolling_mean_centered,  # noqa: E402
+                     rolling_median_binary_centered)
+
+# 0/1 prediction and reference calls; stored as booleans, which Parquet
+# bit-packs, and cast back to uint8 by app.py on load
+BINARY_COLUMNS = ['caduceus_pred', 'dnabert2_pred', 'grover_pred', 'reference_label']
+
+# Per-class model probabilities; the models emit float32 and the CSVs only
+# widen them (to within 1e-16), so storing them as float32 halves their size
+PROBABILITY_COLUMNS = ['caduceus_prob0', 'caduceus_prob1', 'dnabert2_prob0', 'dnabert2_prob1',
+                       'grover_prob0', 'grover_prob1']
+
+# Window index and start position, which fit in 32 bits
+INTEGER_COLUMNS = ['Seq_Id', 'start']
+
+def main():
+    for csv_path in sorted(glob.glob(os.path.join(DATA_DIR, 'processed_*_combined.csv'))):
+        parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+        df = pd.read_csv(csv_path)
+        predictions = df['caduceus_pred'].to_numpy()
+        # The scores stay float64 so thresholding them gives the same calls as
+        # computing them in the app
+        df[SCORE_COLUMNS['mws']] = rolling_sum_centered(predictions, SCORE_WINDOWS['mws']) / SCORE_WINDOWS['mws']
+        df[SCORE_COLUMNS['mwa']] = rolling_mean_centered(predictions, SCORE_WINDOWS['mwa'])
+        df[SCORE_COLUMNS['median']] = rolling_median_binary_centered(predictions, SCORE_WINDOWS['median'])
+        df[BINARY_COLUMNS] = df[BINARY_COLUMNS].astype(bool)
+        df[PROBABILITY_COLUMNS] = df[PROBABILITY_COLUMNS].astype('float32')
+        df[INTEGER_COLUMNS] = df[INTEGER_COLUMNS].astype('int32')
+        df.to_parquet(parquet_path, compression='zstd', index=False)
+        print(f"Wrote {os.path.relpath(parquet_path)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling import rolling_sum_centered, rolling_mean_centered, rolling_median_binary_centered
+
+KERNELS = [
+    (rolling_sum_centered, 'sum'),
+    (rolling_mean_centered, 'mean'),
+    (rolling_median_binary_centered, 'median'),
+]
+
+
+def pandas_rolling(values, window, method):
+    rolling = pd.Series(values, dtype=np.float64).rolling(window, center=True, min_periods=1)
+    return getattr(rolling, method)().to_numpy()
+
+
+@pytest.mark.parametrize('kernel, method', KERNELS)
+@pytest.mark.parametrize('window', [1, 2, 5, 60, 70, 85])
+@pytest.mark.parametrize('n', [1, 3, 59, 1000])
+def test_matches_pandas(kernel, method, window, n):
+    values = np.random.default_rng(n * 100 + window).integers(0, 2, n)
+    result = kernel(values, window)
+    assert not np.isnan(result).any()
+    np.testing.assert_allclose(result, pandas_rolling(values, window, method))
+
+
+@pytest.mark.parametrize('kernel, method', KERNELS)
+def test_empty_input(kernel, method):
+    assert len(kernel(np.array([], dtype=np.uint8), 60)) == 0